@@ -1,4 +1,6 @@
-from typing import List, Dict, Optional
+from typing import List, Optional
+
+from models import Alert
 
 CAP_FULL_THRESHOLD = 0.99995   # 99.995%
 
@@ -9,7 +11,7 @@ def handle_caps_metric(
     name: str,
     value: float,
     last_value: Optional[float],
-) -> List[Dict]:
+) -> List[Alert]:
     """
     State-based alerting for cap metrics.
 
@@ -17,7 +19,7 @@ def handle_caps_metric(
     - minor update when cap is reached
     - major alert when cap is freed
     """
-    alerts: List[Dict] = []
+    alerts: List[Alert] = []
 
     if last_value is None:
         return alerts
@@ -25,34 +27,29 @@ def handle_caps_metric(
     was_full = last_value >= CAP_FULL_THRESHOLD
     is_full = value >= CAP_FULL_THRESHOLD
 
-    is_supply = "Supply" in name
-
     # not full -> full
     if not was_full and is_full:
-        alerts.append(
-            {
-                "category": "caps",
-                "level": "minor",
-                "metric_key": key,
-                "message": (
-                    f"🧢 {name.replace('Supply', '').replace('Borrow', '').replace('Cap', '').replace('   Usage', '')} reached its {'**supply**' if is_supply else '**borrow**'} cap\n"
-                    f"Usage: 100.00%"
-                ),
-            }
-        )
+        alerts.append(Alert("caps", "minor", "reached", key, name, value))
 
     # full -> not full
     elif was_full and not is_full:
-        alerts.append(
-            {
-                "category": "caps",
-                "level": "major",
-                "metric_key": key,
-                "message": (
-                    f"🚨 {name.replace('Supply', '').replace('Borrow', '').replace('Cap', '').replace('   Usage', '')} is no longer at its {'**supply**' if is_supply else '**borrow**'} cap\n"
-                    f"Usage: {value * 100:.2f}%"
-                ),
-            }
+        alerts.append(Alert("caps", "major", "freed", key, name, value))
+
+    return alerts
+
+
+def render_caps_alert(alert: Alert) -> str:
+    name = alert.name
+    label = name.replace('Supply', '').replace('Borrow', '').replace('Cap', '').replace('   Usage', '')
+    side = '**supply**' if "Supply" in name else '**borrow**'
+
+    if alert.kind == "reached":
+        return (
+            f"🧢 {label} reached its {side} cap\n"
+            f"Usage: 100.00%"
         )
 
-    return alerts
\ No newline at end of file
+    return (
+        f"🚨 {label} is no longer at its {side} cap\n"
+        f"Usage: {alert.value * 100:.2f}%"
+    )
@@ -1,5 +1,6 @@
-from typing import List, Dict, Optional
+from typing import List, Optional
 
+from models import Alert
 from storage.sqlite import record_sample, get_last
 
 MINOR_CHANGE = 0.01   # 1%
@@ -16,11 +17,11 @@ def handle_rate_metric(
     name: str,
     value: float,
     unit: Optional[str],
-) -> List[Dict]:
+) -> List[Alert]:
     """
     Delta-based alerting for rate metrics with sticky baseline.
     """
-    alerts: List[Dict] = []
+    alerts: List[Alert] = []
 
     baseline_key = _baseline_key(key)
     baseline = get_last(baseline_key)
@@ -33,33 +34,16 @@ def handle_rate_metric(
             value=value,
             unit=unit,
         )
-        alerts.append(
-            {
-                "category": "rates",
-                "level": "minor",
-                "metric_key": key,
-                "message": f"{name} initial value: {value:.2%}",
-            }
-        )
+        alerts.append(Alert("rates", "minor", "initial", key, name, value))
         return alerts
 
     delta = value - baseline
     abs_delta = abs(delta)
-    direction = "⬆️" if delta > 0 else "⬇️"
 
     # major alert
     if abs_delta >= MAJOR_CHANGE:
         alerts.append(
-            {
-                "category": "rates",
-                "level": "major",
-                "metric_key": key,
-                "message": (
-                    f"🚨🚨 {direction} {name} moved ≥ 10%\n"
-                    f"Baseline: {baseline:.2%}\n"
-                    f"Current: {value:.2%}"
-                ),
-            }
+            Alert("rates", "major", "major", key, name, value, baseline)
         )
 
         record_sample(
@@ -72,16 +56,7 @@ def handle_rate_metric(
     # minor alert
     elif abs_delta >= MINOR_CHANGE:
         alerts.append(
-            {
-                "category": "rates",
-                "level": "minor",
-                "metric_key": key,
-                "message": (
-                    f"🚨 {direction} {name} moved ≥ 1%\n"
-                    f"Baseline: {baseline:.2%}\n"
-                    f"Current: {value:.2%}"
-                ),
-            }
+            Alert("rates", "minor", "minor", key, name, value, baseline)
         )
 
         record_sample(
@@ -91,4 +66,22 @@ def handle_rate_metric(
             unit=unit,
         )
 
-    return alerts
\ No newline at end of file
+    return alerts
+
+
+def render_rate_alert(alert: Alert) -> str:
+    name = alert.name
+    value = alert.value
+
+    if alert.kind == "initial":
+        return f"{name} initial value: {value:.2%}"
+
+    baseline = alert.baseline
+    direction = "⬆️" if value - baseline > 0 else "⬇️"
+    sirens, threshold = ("🚨🚨", "10%") if alert.kind == "major" else ("🚨", "1%")
+
+    return (
+        f"{sirens} {direction} {name} moved ≥ {threshold}\n"
+        f"Baseline: {baseline:.2%}\n"
+        f"Current: {value:.2%}"
+    )
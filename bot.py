@@ -1,17 +1,28 @@
+import asyncio
 import os
 import time
 import logging
 from dotenv import load_dotenv
 
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 from github import Github, Auth, GithubException
 
-from engine import run_once
+import profiler
+from models import Alert
+import engine
 from storage.sqlite import (
+    init_db,
     get_last,
     list_metrics,
+    load_snapshot,
+    pending_alerts,
+    mark_sent,
+    mark_failed,
+    prune_outbox,
 )
+from storage.index import KeyTrie
 
 
 logging.basicConfig(
@@ -25,9 +36,20 @@ logger = logging.getLogger("stonks")
 BOT_START_TIME = time.time()
 LAST_ENGINE_RUN = None
 LAST_ENGINE_ERROR = None
+NEXT_ENGINE_RUN = None
+FETCHER_HEALTH = {}
+RUNTIME_LOADED = False
+METRIC_INDEX = KeyTrie()
+TREE_SYNCED = False
+PROFILE_CHANNEL_ID = None
 
 ALERT_INTERVAL_SECONDS = 5 * 60
 ALERT_TTL_SECONDS = 24 * 60 * 60
+OUTBOX_POLL_SECONDS = 30
+OUTBOX_MAX_ATTEMPTS = 10
+
+METRICS_PAGE_SIZE = 20
+MESSAGE_LIMIT = 2000
 
 load_dotenv()
 
@@ -37,6 +59,10 @@ ROLE_ID = os.getenv("DISCORD_ALERT_ROLE_ID")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_REPO = os.getenv("GITHUB_REPO")
 
+# "external": collection runs in `python -m engine --loop`,
+# the bot only delivers alerts from the outbox
+EXTERNAL_ENGINE = os.getenv("ENGINE_MODE", "embedded") == "external"
+
 CHANNELS = {
     "rates": int(os.getenv("DISCORD_RATES_CHANNEL_ID", "0")),
     "caps": int(os.getenv("DISCORD_CAPS_CHANNEL_ID", "0")),
@@ -60,17 +86,95 @@ bot = commands.Bot(
 )
 
 
-def resolve_metric_name(metric_key: str) -> str:
+def sync_runtime():
+    """
+    Pick up engine times from the runtime snapshot in storage.
+    """
+    global LAST_ENGINE_RUN, LAST_ENGINE_ERROR, NEXT_ENGINE_RUN
+    global FETCHER_HEALTH, RUNTIME_LOADED
+
+    RUNTIME_LOADED = True
+
+    snapshot = load_snapshot()
+    if snapshot:
+        LAST_ENGINE_RUN = snapshot.get("last_run")
+        LAST_ENGINE_ERROR = snapshot.get("last_error")
+        NEXT_ENGINE_RUN = snapshot.get("next_run")
+        FETCHER_HEALTH = snapshot.get("fetchers", {})
+
+
+def ensure_runtime():
+    if not RUNTIME_LOADED:
+        sync_runtime()
+
+
+def format_ago(ts) -> str:
+    if ts is None:
+        return "never"
+
+    time_since = time.time() - ts
+    if time_since > 60:
+        return f"{time_since / 60:.0f}m ago"
+    return f"{time_since:.0f}s ago"
+
+
+def refresh_index():
+    """
+    Rebuild the metric key index from storage.
+    """
+    global METRIC_INDEX
+
+    index = KeyTrie()
     for m in list_metrics():
-        if m["key"] == metric_key:
-            return m["name"]
-    return metric_key
+        if not m["key"].endswith(":baseline"):
+            index.insert(m["key"], m["name"])
+
+    METRIC_INDEX = index
+
+
+def ensure_index():
+    if not len(METRIC_INDEX):
+        refresh_index()
+
+
+def resolve_metric_name(metric_key: str) -> str:
+    ensure_index()
+    return METRIC_INDEX.name(metric_key) or metric_key
+
+
+async def send_lines(ctx, header: str, lines: list):
+    """
+    Send header + lines, split across messages under Discord's limit.
+    """
+    message = header
+    for line in lines:
+        if len(message) + len(line) + 1 > MESSAGE_LIMIT:
+            await ctx.send(message)
+            message = ""
+        message += f"\n{line}" if message else line
+    await ctx.send(message)
 
 
 @bot.event
 async def on_ready():
+    global TREE_SYNCED
+
     logger.info(f"Logged in as {bot.user}")
-    alert_loop.start()
+    init_db()
+
+    if EXTERNAL_ENGINE:
+        alert_loop.change_interval(seconds=OUTBOX_POLL_SECONDS)
+
+    if not alert_loop.is_running():
+        alert_loop.start()
+
+    # slash commands are optional, a failed sync must not stop alerting
+    if not TREE_SYNCED:
+        try:
+            await bot.tree.sync()
+            TREE_SYNCED = True
+        except discord.DiscordException:
+            logger.exception("Failed to sync slash commands")
 
 
 @bot.event
@@ -89,10 +193,47 @@ async def on_guild_join(guild: discord.Guild):
             break
 
 
-def format_alert(alert: dict) -> str:
-    if alert["level"] == "major" and ROLE_ID:
-        return f"<@&{ROLE_ID}> {alert['message']}"
-    return alert["message"]
+def format_alert(alert: Alert) -> str:
+    if alert.level == "major" and ROLE_ID:
+        return f"<@&{ROLE_ID}> {alert.message}"
+    return alert.message
+
+
+async def deliver_outbox():
+    """
+    Send pending outbox alerts, at-least-once.
+
+    An alert is marked sent only after Discord accepted it, so a crash
+    in between re-sends it on the next run. Rejected alerts are
+    dead-lettered (4xx) or retried up to OUTBOX_MAX_ATTEMPTS times
+    (429, 5xx), the rest of the batch is still delivered.
+    """
+    for alert_id, _, alert in pending_alerts():
+        channel = bot.get_channel(CHANNELS.get(alert.category))
+
+        if channel:
+            try:
+                await channel.send(
+                    format_alert(alert),
+                    delete_after=ALERT_TTL_SECONDS,
+                )
+            except discord.HTTPException as e:
+                # missing permissions, bad payload... won't go through later
+                permanent = 400 <= e.status < 500 and e.status != 429
+
+                if mark_failed(
+                    alert_id,
+                    permanent=permanent,
+                    max_attempts=OUTBOX_MAX_ATTEMPTS,
+                ):
+                    logger.error(f"Giving up on alert {alert_id}: {e}")
+                else:
+                    logger.warning(f"Failed to deliver alert {alert_id}, will retry: {e}")
+                continue
+
+        mark_sent(alert_id)
+
+    prune_outbox(ALERT_TTL_SECONDS)
 
 
 @tasks.loop(seconds=ALERT_INTERVAL_SECONDS)
@@ -101,33 +242,80 @@ async def alert_loop():
 
     await bot.wait_until_ready()
 
+    # nothing below may escape, it would stop the loop for good
+    if EXTERNAL_ENGINE:
+        try:
+            sync_runtime()
+        except Exception:
+            logger.exception("Failed to read runtime snapshot")
+
+    else:
+        try:
+            engine.run_cycle(ALERT_INTERVAL_SECONDS)
+
+            LAST_ENGINE_RUN = engine.LAST_RUN
+            LAST_ENGINE_ERROR = engine.LAST_ERROR
+        except Exception:
+            LAST_ENGINE_ERROR = time.time()
+            logger.exception("Engine error")
+
     try:
-        alerts = run_once()
-        LAST_ENGINE_RUN = time.time()
-        LAST_ENGINE_ERROR = None
+        await post_profiles()
+        refresh_index()
+        await deliver_outbox()
     except Exception:
-        LAST_ENGINE_ERROR = time.time()
-        logger.exception("Engine error")
+        logger.exception("Outbox delivery error")
+
+
+@alert_loop.before_loop
+async def before_alert_loop():
+    await bot.wait_until_ready()
+
+    if EXTERNAL_ENGINE:
+        return
+
+    # warm start: resume the previous schedule, the first cycle runs
+    # when it is due rather than a full interval after startup
+    try:
+        wait = engine.seconds_until_due(ALERT_INTERVAL_SECONDS)
+    except Exception:
+        logger.exception("Failed to read runtime snapshot")
         return
 
-    for alert in alerts:
-        channel = bot.get_channel(CHANNELS.get(alert["category"]))
+    if not wait:
+        return
+
+    logger.info(f"Runtime snapshot is fresh, next cycle in {wait:.0f}s")
+
+    # alerts queued before the restart shouldn't wait for it
+    try:
+        await deliver_outbox()
+    except Exception:
+        logger.exception("Outbox delivery error")
+
+    await asyncio.sleep(wait)
+
+
+async def post_profiles():
+    summaries = profiler.pop_summaries()
+    channel = bot.get_channel(PROFILE_CHANNEL_ID) if PROFILE_CHANNEL_ID else None
+
+    for summary in summaries:
+        logger.info(summary)
         if channel:
-            await channel.send(
-                format_alert(alert),
-                delete_after=ALERT_TTL_SECONDS,
-            )
+            await channel.send(summary)
 
 
 @bot.command()
 async def help(ctx):
     await ctx.send(
         "**Commands:**\n"
-        "`$metrics` – list metrics\n"
-        "`$check <metric_key>` – inspect metric\n"
+        "`$metrics [page]` – list metrics\n"
+        "`$check <metric_key>` – inspect metric (`*` wildcards allowed)\n"
         "`$issue <text>` – create GitHub issue\n"
         "`$info` – bot info\n"
         "`$status` – bot health\n"
+        "`$profile [cycles]` – profile engine cycles (admin)\n"
     )
 
 
@@ -145,33 +333,66 @@ async def info(ctx):
     )
 
 
+def paginate(keys: list, page: int):
+    """
+    Slice keys to one page, returns (page_keys, page, pages).
+    """
+    pages = max(1, (len(keys) + METRICS_PAGE_SIZE - 1) // METRICS_PAGE_SIZE)
+    page = max(1, min(page, pages))
+    start = (page - 1) * METRICS_PAGE_SIZE
+
+    return keys[start:start + METRICS_PAGE_SIZE], page, pages
+
+
 @bot.command()
-async def metrics(ctx):
-    metrics = [
-        m for m in list_metrics()
-        if not m["key"].endswith(":baseline")
-    ]
+async def metrics(ctx, page: int = 1):
+    ensure_index()
+    keys = METRIC_INDEX.keys()
 
-    if not metrics:
+    if not keys:
         await ctx.send("No metrics recorded yet.")
         return
-    
-    await ctx.send(
-        "**Known Metrics:**\n" +
-        "\n".join(f"`{m['key']}` – {m['name']}" for m in metrics)
-    )
 
+    keys, page, pages = paginate(keys, page)
 
-@bot.command()
-async def check(ctx, metric_key: str):
-    current = get_last(metric_key)
-    now = time.time()
-    time_since = now - LAST_ENGINE_RUN if LAST_ENGINE_RUN else None
+    lines = [f"`{key}` – {METRIC_INDEX.name(key)}" for key in keys]
+    if page < pages:
+        lines.append(f"`$metrics {page + 1}` for more")
+
+    await send_lines(ctx, f"**Known Metrics ({page}/{pages}):**", lines)
+
+
+@bot.hybrid_command()
+@app_commands.describe(
+    metric_key="metric key, `*` matches a segment",
+    page="page of wildcard matches",
+)
+async def check(ctx, metric_key: str, page: int = 1):
+    ensure_runtime()
+    ago = format_ago(LAST_ENGINE_RUN)
+
+    if "*" in metric_key or "?" in metric_key:
+        ensure_index()
+        keys = METRIC_INDEX.match(metric_key)
+
+        if not keys:
+            await ctx.send(f"❌ No metrics match `{metric_key}`")
+            return
+
+        keys, page, pages = paginate(keys, page)
+
+        lines = []
+        for key in keys:
+            value = get_last(key)
+            if value is not None:
+                lines.append(f"`{key}` – {value:.2%}")
+        if page < pages:
+            lines.append(f"`$check {metric_key} {page + 1}` for more")
 
-    more_than_minute = time_since > 60
+        await send_lines(ctx, f"**{metric_key}** ({page}/{pages}, {ago}):", lines)
+        return
 
-    if time_since and more_than_minute:
-        time_since = time_since / 60
+    current = get_last(metric_key)
 
     if current is None:
         await ctx.send(f"❌ Unknown metric key: `{metric_key}`")
@@ -185,7 +406,7 @@ async def check(ctx, metric_key: str):
 
         await ctx.send(
             f"**{name}:**\n"
-            f"{current:.2%} ({time_since:.0f}{'m' if more_than_minute else 's'} ago)\n"
+            f"{current:.2%} ({ago})\n"
         )
         return
 
@@ -193,12 +414,23 @@ async def check(ctx, metric_key: str):
 
     await ctx.send(
         f"**{name}:**\n"
-        f"{current:.2%} ({time_since:.0f}{'m' if more_than_minute else 's'} ago)\n"
+        f"{current:.2%} ({ago})\n"
     )
 
 
+@check.autocomplete("metric_key")
+async def check_autocomplete(interaction: discord.Interaction, current: str):
+    ensure_index()
+    return [
+        app_commands.Choice(name=key, value=key)
+        for key in METRIC_INDEX.complete(current)
+    ]
+
+
 @bot.command()
 async def status(ctx):
+    sync_runtime()
+
     now = time.time()
     
     uptime_m = int((now - BOT_START_TIME) / 60)
@@ -215,11 +447,32 @@ async def status(ctx):
         else f"{int((now - LAST_ENGINE_ERROR) / 60)}m ago"
     )
 
+    next_run = (
+        "unknown"
+        if NEXT_ENGINE_RUN is None
+        else f"in {max(0, int((NEXT_ENGINE_RUN - now) / 60))}m"
+    )
+
+    fetchers = []
+    for fetcher_name, health in sorted(FETCHER_HEALTH.items()):
+        ok_at = health.get("last_ok")
+        error_at = health.get("last_error")
+
+        if error_at and (ok_at is None or error_at > ok_at):
+            fetchers.append(
+                f"❌ `{fetcher_name}` failed {format_ago(error_at)}: "
+                f"{health.get('error')}"
+            )
+        else:
+            fetchers.append(f"✅ `{fetcher_name}` ok {format_ago(ok_at)}")
+
     await ctx.send(
         f"**Bot Status:**\n"
         f"Uptime: {uptime_m}m\n"
         f"Last engine run: {last_run}\n"
         f"Last engine error: {last_error}\n"
+        f"Next engine run: {next_run}\n"
+        + "".join(f"{line}\n" for line in fetchers)
     )
 
 
@@ -254,6 +507,33 @@ async def issue(ctx, *, text: str):
         await ctx.send(f"❌ Unexpected error: `{e}`")
 
 
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def profile(ctx, cycles: int = 1):
+    global PROFILE_CHANNEL_ID
+
+    if EXTERNAL_ENGINE:
+        await ctx.send(
+            "❌ The engine runs externally, "
+            "set `STONKS_PROFILE_CYCLES` on the engine process."
+        )
+        return
+
+    cycles = max(1, min(cycles, 10))
+    profiler.arm(cycles)
+    PROFILE_CHANNEL_ID = ctx.channel.id
+
+    await ctx.send(f"Profiling the next {cycles} engine cycle(s).")
+
+
+@profile.error
+async def profile_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ Admins only.")
+        return
+    await ctx.send("❌ Usage: `$profile [cycles]`")
+
+
 @bot.command()
 async def ping(ctx):
     await ctx.send("pong")
@@ -1,6 +1,21 @@
-from typing import List, Dict
+import argparse
+import logging
+import sys
+import time
+from typing import Callable, List, Dict, Optional
 
-from storage.sqlite import init_db, record_sample, get_last
+import profiler
+from models import Alert, Metric
+from storage.sqlite import (
+    init_db,
+    record_sample,
+    get_last,
+    enqueue_alerts,
+    save_snapshot,
+    load_snapshot,
+    prune_samples,
+    transaction,
+)
 
 from fetchers.silo import fetch as fetch_silo
 from fetchers.euler import fetch as fetch_euler
@@ -10,60 +25,260 @@ from alerts.caps import handle_caps_metric
 from alerts.rates import handle_rate_metric
 
 
-def run_once() -> List[Dict]:
+ENGINE_INTERVAL_SECONDS = 5 * 60
+HISTORY_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+logger = logging.getLogger("stonks.engine")
+
+FETCHERS: Dict[str, Callable[[], List[Metric]]] = {
+    "silo": fetch_silo,
+    "euler": fetch_euler,
+    "aave": fetch_aave,
+}
+
+LAST_RUN: Optional[float] = None
+LAST_ERROR: Optional[float] = None
+
+# last value evaluated per key in this process, starts cold on restart
+# (metrics.value in storage is the durable copy)
+_LAST_EVALUATED: Dict[str, float] = {}
+
+# fetcher name -> last_ok, last_error, error
+_FETCHER_HEALTH: Dict[str, Dict] = {}
+
+_RESTORED = False
+
+
+def evaluate_metric(metric: Metric) -> List[Alert]:
     """
-    Run all fetchers once, store samples, evaluate alerts.
+    Store one sample and evaluate its alerts.
+    """
+    last_value = get_last(metric.key)
+
+    # always record current value
+    record_sample(
+        metric_key=metric.key,
+        name=metric.name,
+        value=metric.value,
+        unit=metric.unit,
+    )
+
+    if metric.unit == "ratio":
+        return handle_caps_metric(
+            key=metric.key,
+            name=metric.name,
+            value=metric.value,
+            last_value=last_value,
+        )
+
+    return handle_rate_metric(
+        key=metric.key,
+        name=metric.name,
+        value=metric.value,
+        unit=metric.unit,
+    )
+
+
+def run_once() -> List[Alert]:
+    """
+    Run all fetchers once, store samples, evaluate alerts and queue
+    them in the outbox. A failing fetcher is logged and recorded in its
+    health, the others still run. Returns the queued alerts.
+
+    Each metric's sample, baseline and alerts are committed together,
+    so an alert is never lost once the state that produced it moved.
 
     Alerting models:
     - Rates: delta-based, sticky baseline
     - Caps: state-based (full vs not full)
+
+    Profiled when armed, see profiler.py.
     """
+    if profiler.armed():
+        return profiler.profile(_run_once)
+
+    return _run_once()
+
+
+def _run_once() -> List[Alert]:
     init_db()
 
-    alerts: List[Dict] = []
-
-    fetchers = [
-        fetch_silo,
-        fetch_euler,
-        fetch_aave,
-    ]
-
-    for fetcher in fetchers:
-        metrics = fetcher()
-
-        for metric in metrics:
-            key = metric["key"]
-            name = metric["name"]
-            value = float(metric["value"])
-            unit = metric.get("unit")
-
-            last_value = get_last(key)
-
-            # always record current value
-            record_sample(
-                metric_key=key,
-                name=name,
-                value=value,
-                unit=unit,
-            )
-
-            if unit == "ratio":
-                alerts.extend(
-                    handle_caps_metric(
-                        key=key,
-                        name=name,
-                        value=value,
-                        last_value=last_value,
-                    )
-                )
-            else:
-                alerts.extend(
-                    handle_rate_metric(
-                        key=key,
-                        name=name,
-                        value=value,
-                        unit=unit,
+    alerts: List[Alert] = []
+
+    for fetcher_name, fetcher in FETCHERS.items():
+        health = _FETCHER_HEALTH.setdefault(fetcher_name, {})
+
+        # one failing fetcher must not discard what the others produced
+        try:
+            metrics = fetcher()
+            health["last_ok"] = time.time()
+
+            for metric in metrics:
+                # unchanged value -> same alert outcome as last time,
+                # only keep the sample
+                if _LAST_EVALUATED.get(metric.key) == metric.value:
+                    record_sample(
+                        metric_key=metric.key,
+                        name=metric.name,
+                        value=metric.value,
+                        unit=metric.unit,
                     )
-                )
+                    continue
+
+                with transaction():
+                    metric_alerts = evaluate_metric(metric)
+                    enqueue_alerts(metric_alerts)
+
+                alerts.extend(metric_alerts)
+                _LAST_EVALUATED[metric.key] = metric.value
+
+        except Exception as e:
+            health["last_error"] = time.time()
+            health["error"] = f"{type(e).__name__}: {e}"[:200]
+            logger.exception(f"Fetcher {fetcher_name} failed")
+
+    return alerts
+
+
+def restore_state() -> Optional[Dict]:
+    """
+    Warm-start from the last runtime snapshot, once per process.
+    """
+    global LAST_RUN, LAST_ERROR, _RESTORED
+
+    if _RESTORED:
+        return None
+    _RESTORED = True
+
+    init_db()
+    snapshot = load_snapshot()
+    if not snapshot:
+        return None
+
+    LAST_RUN = snapshot.get("last_run")
+    LAST_ERROR = snapshot.get("last_error")
+    _FETCHER_HEALTH.update(snapshot.get("fetchers", {}))
+
+    return snapshot
+
+
+def reset_state():
+    """
+    Forget in-process runtime state, e.g. after switching databases.
+    """
+    global LAST_RUN, LAST_ERROR, _RESTORED
+
+    LAST_RUN = None
+    LAST_ERROR = None
+    _LAST_EVALUATED.clear()
+    _FETCHER_HEALTH.clear()
+    _RESTORED = False
+
+
+def _save_state(interval: int):
+    save_snapshot(
+        {
+            "last_run": LAST_RUN,
+            "last_error": LAST_ERROR,
+            "next_run": LAST_RUN + interval if LAST_RUN else None,
+            "fetchers": _FETCHER_HEALTH,
+        }
+    )
+
+
+def seconds_until_due(interval: int = ENGINE_INTERVAL_SECONDS) -> float:
+    """
+    Time left before the next cycle is due, 0 if it is due now.
+    """
+    restore_state()
+
+    if LAST_RUN is None:
+        return 0.0
+
+    return max(0.0, LAST_RUN + interval - time.time())
+
+
+def run_cycle(interval: int = ENGINE_INTERVAL_SECONDS) -> int:
+    """
+    Run one engine cycle (alerts are queued as they are raised), prune
+    old history and save the runtime snapshot. Returns the number of
+    alerts queued.
+    """
+    global LAST_RUN, LAST_ERROR
+
+    restore_state()
+    started = time.time()
+
+    try:
+        alerts = run_once()
+    except Exception:
+        LAST_ERROR = time.time()
+        _save_state(interval)
+        raise
+
+    LAST_RUN = time.time()
+
+    failed = any(
+        health.get("last_error", 0) >= started
+        for health in _FETCHER_HEALTH.values()
+    )
+    LAST_ERROR = LAST_RUN if failed else None
+
+    # this is the process writing samples, keep history bounded here
+    prune_samples(HISTORY_RETENTION_SECONDS)
+
+    _save_state(interval)
+
+    return len(alerts)
+
+
+def _log_profiles():
+    for summary in profiler.pop_summaries():
+        logger.info(summary)
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Headless engine, independent of the Discord bot.
+
+        python -m engine --once
+        python -m engine --loop --interval 300
+    """
+    parser = argparse.ArgumentParser(description="stonks engine")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="run a single cycle (default)")
+    mode.add_argument("--loop", action="store_true", help="run cycles forever")
+    parser.add_argument("--interval", type=int, default=ENGINE_INTERVAL_SECONDS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+
+    if not args.loop:
+        logger.info(f"Queued {run_cycle(args.interval)} alerts")
+        _log_profiles()
+        sys.exit(1 if LAST_ERROR else 0)
+
+    # snapshot still fresh -> resume the previous schedule
+    wait = seconds_until_due(args.interval)
+    if wait:
+        logger.info(f"Last cycle is recent, next one in {wait:.0f}s")
+        time.sleep(wait)
+
+    while True:
+        started = time.monotonic()
+
+        try:
+            logger.info(f"Queued {run_cycle(args.interval)} alerts")
+        except Exception:
+            logger.exception("Engine error")
+
+        _log_profiles()
+
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
 
-    return alerts
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-import requests
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
+
+from fetchers.client import fetch_json
+from models import Metric
 
 
 AAVE_GRAPHQL_URL = "https://api.v3.aave.com/graphql"
@@ -61,21 +63,10 @@ def _to_float(x: Any) -> float:
     raise TypeError(f"Cannot convert to float: {x}")
 
 
-def _fetch_cap_ratios(symbol: str, address: str) -> Dict[str, float]:
-    query = QUERY_TEMPLATE % (CHAIN_ID, POOL_ADDRESS, address)
-
-    r = requests.post(
-        AAVE_GRAPHQL_URL,
-        json={"query": query},
-        headers={"Content-Type": "application/json"},
-        timeout=20,
-    )
-    r.raise_for_status()
-    payload = r.json()
-
+def _extract_cap_ratios(payload: Dict) -> Optional[Dict[str, float]]:
     reserve = payload.get("data", {}).get("reserve")
     if not reserve:
-        raise RuntimeError(f"Aave response missing reserve for {symbol}")
+        return None
 
     supply = reserve["supplyInfo"]
     borrow = reserve["borrowInfo"]
@@ -106,7 +97,22 @@ def _fetch_cap_ratios(symbol: str, address: str) -> Dict[str, float]:
     }
 
 
-def fetch() -> List[Dict]:
+def _fetch_cap_ratios(symbol: str, address: str) -> Dict[str, float]:
+    query = QUERY_TEMPLATE % (CHAIN_ID, POOL_ADDRESS, address)
+
+    ratios = fetch_json(
+        AAVE_GRAPHQL_URL,
+        _extract_cap_ratios,
+        body={"query": query},
+    )
+
+    if ratios is None:
+        raise RuntimeError(f"Aave response missing reserve for {symbol}")
+
+    return ratios
+
+
+def fetch() -> List[Metric]:
     """
     Fetch Aave supply-cap and borrow-cap usage ratios
     for RLUSD and PYUSD.
@@ -114,25 +120,25 @@ def fetch() -> List[Dict]:
     Ratios:
       1.0 == 100%
     """
-    metrics: List[Dict] = []
+    metrics: List[Metric] = []
 
     for symbol, address in TOKENS.items():
         ratios = _fetch_cap_ratios(symbol, address)
 
         metrics.extend(
             [
-                {
-                    "key": f"aave:{symbol.lower()}:supply:cap",
-                    "name": f"Aave {symbol} Supply Cap Usage",
-                    "value": ratios["supply_ratio"],
-                    "unit": "ratio",
-                },
-                {
-                    "key": f"aave:{symbol.lower()}:borrow:cap",
-                    "name": f"Aave {symbol} Borrow Cap Usage",
-                    "value": ratios["borrow_ratio"],
-                    "unit": "ratio",
-                },
+                Metric(
+                    key=f"aave:{symbol.lower()}:supply:cap",
+                    name=f"Aave {symbol} Supply Cap Usage",
+                    value=ratios["supply_ratio"],
+                    unit="ratio",
+                ),
+                Metric(
+                    key=f"aave:{symbol.lower()}:borrow:cap",
+                    name=f"Aave {symbol} Borrow Cap Usage",
+                    value=ratios["borrow_ratio"],
+                    unit="ratio",
+                ),
             ]
         )
 
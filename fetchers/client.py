@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import requests
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple, TypeVar
+
+from fetchers.stream import Path, iter_values, walk
+
+T = TypeVar("T")
+
+
+# opt-in: parse listing payloads while they download, see fetch_fields
+STREAM_JSON = os.getenv("STONKS_STREAM_JSON", "0") == "1"
+CHUNK_SIZE = 64 * 1024
+
+_SESSION = requests.Session()
+
+# request key -> validators, fingerprint and extracted result
+_CACHE: Dict[Tuple, Dict[str, Any]] = {}
+
+
+def _fingerprint(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _fetch(
+    cache_key: Tuple,
+    url: str,
+    parse: Callable[[requests.Response], T],
+    *,
+    body: Optional[Dict] = None,
+    timeout: float = 20,
+    stream: bool = False,
+) -> T:
+    entry = _CACHE.get(cache_key)
+
+    # validators on a POST would get 412 rather than 304,
+    # POST bodies rely on the fingerprint alone
+    headers = {}
+    if entry and body is None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    if body is None:
+        r = _SESSION.get(url, headers=headers, timeout=timeout, stream=stream)
+    else:
+        r = _SESSION.post(url, json=body, headers=headers, timeout=timeout)
+
+    with r:
+        if r.status_code == 304 and entry:
+            return entry["result"]
+
+        r.raise_for_status()
+
+        # a streamed body is not read to the end, so it can't be fingerprinted
+        fingerprint = None if stream else _fingerprint(r.content)
+
+        if fingerprint and entry and entry["fingerprint"] == fingerprint:
+            result = entry["result"]
+        else:
+            result = parse(r)
+
+    _CACHE[cache_key] = {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "fingerprint": fingerprint,
+        "result": result,
+    }
+
+    return result
+
+
+def fetch_json(
+    url: str,
+    extract: Callable[[Any], T],
+    *,
+    body: Optional[Dict] = None,
+    timeout: float = 20,
+) -> T:
+    """
+    GET url (POST when body is given) and return extract(payload).
+
+    The extracted result is cached per request. When the server answers
+    304 to If-None-Match/If-Modified-Since, or returns the exact same
+    bytes, the cached result is returned without decoding the payload.
+
+    extract should be a module-level function, it is part of the cache key.
+    """
+    cache_key = (
+        url,
+        json.dumps(body, sort_keys=True) if body is not None else None,
+        extract,
+    )
+
+    return _fetch(
+        cache_key,
+        url,
+        lambda r: extract(r.json()),
+        body=body,
+        timeout=timeout,
+    )
+
+
+def fetch_fields(
+    url: str,
+    paths: Sequence[Path],
+    extract: Callable[[Iterator[Tuple[Path, Any]]], T],
+    *,
+    timeout: float = 20,
+) -> T:
+    """
+    GET url and return extract(values), values yielding (path, value)
+    for the leaves matching paths (see fetchers/stream.py).
+
+    By default the full body is decoded with json and fingerprinted
+    like fetch_json. STONKS_STREAM_JSON=1 parses the body while it
+    downloads and stops as soon as extract returns instead. That only
+    pays off when extract stops early in a large payload: the streaming
+    reader is much slower than json per byte, and a streamed body is not
+    fingerprinted (validators still apply).
+    """
+    cache_key = (url, tuple(paths), extract)
+
+    if STREAM_JSON:
+        parse = lambda r: extract(iter_values(r.iter_content(CHUNK_SIZE), paths))
+    else:
+        parse = lambda r: extract(walk(r.json(), paths))
+
+    return _fetch(cache_key, url, parse, timeout=timeout, stream=STREAM_JSON)
@@ -1,5 +1,7 @@
-import requests
-from typing import Any, List, Dict
+from typing import Any, Iterator, List, Dict, Tuple
+
+from fetchers.client import fetch_fields
+from models import Metric
 
 
 EULER_CLASSIC_VAULT_URL = (
@@ -34,6 +36,19 @@ YIELD_VAULTS = {
 }
 
 
+# fields read from the vault listings, "*" is the vault address
+BORROW_APY_FIELDS = [
+    ("*", "vaultSymbol"),
+    ("*", "irmInfo", "interestRateInfo", 0, "borrowAPY"),
+]
+
+CAP_FIELDS = [
+    ("*", "vaultSymbol"),
+    ("*", "totalAssets"),
+    ("*", "supplyCap"),
+]
+
+
 def _to_int(x: Any) -> int:
     if isinstance(x, int):
         return x
@@ -47,78 +62,100 @@ def _to_int(x: Any) -> int:
     raise TypeError(f"Cannot convert to int: {x}")
 
 
-def fetch() -> List[Dict]:
+def _extract_borrow_apy(values: Iterator[Tuple[tuple, Any]]) -> float:
+    vaults: Dict[str, Dict] = {}
+
+    for path, value in values:
+        vault = vaults.setdefault(path[0], {})
+        vault[path[-1]] = value
+
+        if vault.get("vaultSymbol") == TARGET_VAULT_SYMBOL and "borrowAPY" in vault:
+            raw = _to_int(vault["borrowAPY"])
+            return raw / EULER_APY_SCALE
+
+    if not any(v.get("vaultSymbol") == TARGET_VAULT_SYMBOL for v in vaults.values()):
+        raise RuntimeError(f"Euler vault '{TARGET_VAULT_SYMBOL}' not found")
+
+    raise RuntimeError("Euler response missing interestRateInfo")
+
+
+def _extract_cap_ratios(values: Iterator[Tuple[tuple, Any]]) -> Dict[str, float]:
+    vaults: Dict[str, Dict] = {}
+    ratios: Dict[str, float] = {}
+
+    for path, value in values:
+        vault = vaults.setdefault(path[0], {})
+        vault[path[-1]] = value
+
+        vault_symbol = vault.get("vaultSymbol")
+        if (
+            vault_symbol not in YIELD_VAULTS
+            or vault_symbol in ratios
+            or "totalAssets" not in vault
+            or "supplyCap" not in vault
+        ):
+            continue
+
+        total_assets = _to_int(vault["totalAssets"])
+        supply_cap = _to_int(vault["supplyCap"])
+
+        ratios[vault_symbol] = (
+            min(total_assets / supply_cap, 1.0) if supply_cap > 0 else 0.0
+        )
+
+        # got every vault we monitor, stop reading
+        if len(ratios) == len(YIELD_VAULTS):
+            break
+
+    for vault_symbol in YIELD_VAULTS:
+        if vault_symbol not in ratios:
+            raise RuntimeError(f"Euler yield vault '{vault_symbol}' not found")
+
+    return ratios
+
+
+def fetch() -> List[Metric]:
     """
     Fetch Euler metrics:
     - USDC borrow APY (Avalanche, classic)
     - PYUSD supply cap usage (Ethereum, yield)
     - RLUSD supply cap usage (Ethereum, yield)
     """
-    metrics: List[Dict] = []
+    metrics: List[Metric] = []
 
     # borrow apy
 
-    r = requests.get(EULER_CLASSIC_VAULT_URL, timeout=20)
-    r.raise_for_status()
-    data = r.json()
-
-    target = None
-    for v in data.values():
-        if isinstance(v, dict) and v.get("vaultSymbol") == TARGET_VAULT_SYMBOL:
-            target = v
-            break
-
-    if not target:
-        raise RuntimeError(f"Euler vault '{TARGET_VAULT_SYMBOL}' not found")
-
-    irm = target.get("irmInfo", {})
-    info = irm.get("interestRateInfo") or []
-    if not info:
-        raise RuntimeError("Euler response missing interestRateInfo")
-
-    row = info[0]
-    raw = _to_int(row.get("borrowAPY"))
-    rate = raw / EULER_APY_SCALE
+    rate = fetch_fields(
+        EULER_CLASSIC_VAULT_URL,
+        BORROW_APY_FIELDS,
+        _extract_borrow_apy,
+    )
 
     metrics.append(
-        {
-            "key": "euler:usdc:borrow:rate",
-            "name": "Euler USDC Borrow APY",
-            "value": rate,
-            "unit": "rate",
-        }
+        Metric(
+            key="euler:usdc:borrow:rate",
+            name="Euler USDC Borrow APY",
+            value=rate,
+            unit="rate",
+        )
     )
 
     # supply cap usage
-    
-    r = requests.get(EULER_ETHEREUM_VAULT_URL, timeout=20)
-    r.raise_for_status()
-    data = r.json()
 
-    for vault_symbol, meta in YIELD_VAULTS.items():
-        vault = None
-
-        for v in data.values():
-            if isinstance(v, dict) and v.get("vaultSymbol") == vault_symbol:
-                vault = v
-                break
-
-        if not vault:
-            raise RuntimeError(f"Euler yield vault '{vault_symbol}' not found")
-
-        total_assets = _to_int(vault["totalAssets"])
-        supply_cap = _to_int(vault["supplyCap"])
-        decimals = _to_int(vault["assetDecimals"])
-
-        ratio = min(total_assets / supply_cap, 1.0) if supply_cap > 0 else 0.0
+    ratios = fetch_fields(
+        EULER_ETHEREUM_VAULT_URL,
+        CAP_FIELDS,
+        _extract_cap_ratios,
+    )
 
+    for vault_symbol, meta in YIELD_VAULTS.items():
         metrics.append(
-            {
-                "key": meta["key"],
-                "name": meta["name"],
-                "value": ratio,   # ratio: 0.0–1.0
-                "unit": "ratio",
-            }
+            Metric(
+                key=meta["key"],
+                name=meta["name"],
+                value=ratios[vault_symbol],   # ratio: 0.0–1.0
+                unit="ratio",
+            )
         )
 
-    return metrics
\ No newline at end of file
+    return metrics
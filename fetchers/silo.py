@@ -1,29 +1,30 @@
-import requests
+from fetchers.client import fetch_json
+from models import Metric
 
 SILO_MARKET_URL = "https://app.silo.finance/api/lending-market/avalanche/142"
 
 SCALE = 1e18  # debtBaseApr is scaled by 1e18
 
 
-def fetch() -> list[dict]:
+def _extract_rate(data: dict) -> float:
+    silo1 = data["silo1"]  # USDC silo
+    raw_apr = int(silo1["debtBaseApr"])
+    return raw_apr / SCALE  # decimal (e.g. 0.186)
+
+
+def fetch() -> list[Metric]:
     """
     Fetch Silo USDC borrow APR.
 
-    Returns a list of metric dicts.
+    Returns a list of metrics.
     """
-    r = requests.get(SILO_MARKET_URL, timeout=15)
-    r.raise_for_status()
-    data = r.json()
-
-    silo1 = data["silo1"]  # USDC silo
-    raw_apr = int(silo1["debtBaseApr"])
-    rate = raw_apr / SCALE  # decimal (e.g. 0.186)
+    rate = fetch_json(SILO_MARKET_URL, _extract_rate, timeout=15)
 
     return [
-        {
-            "key": "silo:usdc:borrow:rate",
-            "name": "Silo USDC Borrow APR",
-            "value": rate,
-            "unit": "rate",
-        }
-    ]
\ No newline at end of file
+        Metric(
+            key="silo:usdc:borrow:rate",
+            name="Silo USDC Borrow APR",
+            value=rate,
+            unit="rate",
+        )
+    ]
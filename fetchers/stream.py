@@ -0,0 +1,220 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+Path = Tuple[Any, ...]
+
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+# token span first, validated once complete
+_SCALAR = re.compile(r"[-+.eE0-9]+|[a-z]+")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# a lone quote means a string is cut off at the end of the buffer
+_SKIP = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}"]', re.S)
+
+_CONSTANTS = {"true": True, "false": False, "null": None}
+
+
+def _advance(patterns: List[Path], step: Any) -> List[Path]:
+    return [
+        p[1:]
+        for p in patterns
+        if p and (p[0] == "*" or p[0] == step)
+    ]
+
+
+def walk(obj: Any, patterns: Sequence[Path], path: Path = ()) -> Iterator[Tuple[Path, Any]]:
+    """
+    Same output as iter_values, for an already decoded payload.
+    """
+    patterns = list(patterns)
+
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        if () in patterns:
+            yield path, obj
+        return
+
+    for step, child in items:
+        nxt = _advance(patterns, step)
+        if nxt:
+            yield from walk(child, nxt, path + (step,))
+
+
+class _Reader:
+    """
+    Incremental JSON reader over a byte stream.
+
+    Yields (path, value) for scalar leaves whose path matches one of
+    the patterns, skipping everything else without building it.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+            self._pos = 0
+            return True
+
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    def _string(self) -> str:
+        while True:
+            m = _STRING.match(self._buf, self._pos)
+            if m:
+                self._pos = m.end()
+                raw = m.group(1)
+                return json.loads(m.group()) if "\\" in raw else raw
+            if not self._fill():
+                raise ValueError("Truncated JSON string")
+
+    def _scalar(self) -> Any:
+        # the token may continue in the next chunk
+        m = _SCALAR.match(self._buf, self._pos)
+        while m and m.end() == len(self._buf) and not self._eof:
+            self._fill()
+            m = _SCALAR.match(self._buf, self._pos)
+
+        token = m.group() if m else ""
+
+        if token in _CONSTANTS:
+            value = _CONSTANTS[token]
+        elif token and _NUMBER.fullmatch(token):
+            value = float(token) if any(c in token for c in ".eE") else int(token)
+        else:
+            raise ValueError(f"Invalid JSON at offset {self._pos}")
+
+        self._pos = m.end()
+        return value
+
+    def _skip(self):
+        c = self._peek()
+
+        if c == '"':
+            self._string()
+            return
+        if c not in "[{":
+            self._scalar()
+            return
+
+        depth = 0
+        while True:
+            for m in _SKIP.finditer(self._buf, self._pos):
+                token = m.group()
+
+                if token == '"':
+                    self._pos = m.start()
+                    break
+                if token[0] == '"':
+                    continue
+
+                depth += 1 if token in "[{" else -1
+                if depth == 0:
+                    self._pos = m.end()
+                    return
+            else:
+                self._pos = len(self._buf)
+
+            if not self._fill():
+                raise ValueError("Truncated JSON")
+
+    def values(self, path: Path, patterns: List[Path]) -> Iterator[Tuple[Path, Any]]:
+        c = self._peek()
+
+        if c == "{":
+            self._pos += 1
+            if self._peek() == "}":
+                self._pos += 1
+                return
+
+            while True:
+                if self._peek() != '"':
+                    raise ValueError(f"Expected key at offset {self._pos}")
+                key = self._string()
+                self._expect(":")
+
+                nxt = _advance(patterns, key)
+                if nxt:
+                    yield from self.values(path + (key,), nxt)
+                else:
+                    self._skip()
+
+                c = self._peek()
+                self._pos += 1
+                if c == "}":
+                    return
+                if c != ",":
+                    raise ValueError(f"Expected ',' or '}}' at offset {self._pos - 1}")
+
+        elif c == "[":
+            self._pos += 1
+            if self._peek() == "]":
+                self._pos += 1
+                return
+
+            index = 0
+            while True:
+                nxt = _advance(patterns, index)
+                if nxt:
+                    yield from self.values(path + (index,), nxt)
+                else:
+                    self._skip()
+
+                c = self._peek()
+                self._pos += 1
+                if c == "]":
+                    return
+                if c != ",":
+                    raise ValueError(f"Expected ',' or ']' at offset {self._pos - 1}")
+                index += 1
+
+        else:
+            value = self._string() if c == '"' else self._scalar()
+            if () in patterns:
+                yield path, value
+
+
+def iter_values(
+    chunks: Iterable[bytes],
+    patterns: Sequence[Path],
+) -> Iterator[Tuple[Path, Any]]:
+    """
+    Stream (path, value) for scalar leaves matching any of the patterns.
+
+    Patterns are tuples of object keys / array indexes, "*" matches any
+    single step, e.g. ("*", "irmInfo", "interestRateInfo", 0, "borrowAPY").
+    Unmatched subtrees are skipped without being decoded. Reading stops
+    as soon as the consumer stops iterating.
+    """
+    yield from _Reader(chunks).values((), list(patterns))
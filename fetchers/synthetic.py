@@ -0,0 +1,73 @@
+import math
+import random
+from typing import List
+
+from alerts.caps import CAP_FULL_THRESHOLD
+from models import Metric
+
+
+class SyntheticFetcher:
+    """
+    Load generator that plugs into the engine like a real fetcher.
+
+    - rates: random walks (step ~ N(0, rate_step))
+    - caps: oscillate around CAP_FULL_THRESHOLD with noise, so they
+      keep crossing between full and not full
+    """
+
+    def __init__(
+        self,
+        metrics: int,
+        cap_share: float = 0.5,
+        rate_step: float = 0.005,
+        cap_amplitude: float = 0.0002,
+        seed: int = 0,
+    ):
+        self._rng = random.Random(seed)
+        self._step = 0
+        self.rate_step = rate_step
+        self.cap_amplitude = cap_amplitude
+
+        n_caps = int(metrics * cap_share)
+        n_rates = metrics - n_caps
+
+        self._rates = [
+            Metric(
+                key=f"synthetic:t{i}:borrow:rate",
+                name=f"Synthetic T{i} Borrow APR",
+                value=self._rng.uniform(0.01, 0.2),
+                unit="rate",
+            )
+            for i in range(n_rates)
+        ]
+        self._caps = [
+            Metric(
+                key=f"synthetic:t{i}:supply:cap",
+                name=f"Synthetic T{i} Supply Cap Usage",
+                value=CAP_FULL_THRESHOLD,
+                unit="ratio",
+            )
+            for i in range(n_caps)
+        ]
+        self._phases = [self._rng.uniform(0, 2 * math.pi) for _ in self._caps]
+
+    def __call__(self) -> List[Metric]:
+        rng = self._rng
+        self._step += 1
+
+        out: List[Metric] = []
+
+        for m in self._rates:
+            value = max(0.0, m.value + rng.gauss(0.0, self.rate_step))
+            m.value = value
+            out.append(Metric(m.key, m.name, value, m.unit))
+
+        for m, phase in zip(self._caps, self._phases):
+            value = (
+                CAP_FULL_THRESHOLD
+                + self.cap_amplitude * math.sin(phase + self._step)
+                + rng.gauss(0.0, self.cap_amplitude / 4)
+            )
+            out.append(Metric(m.key, m.name, min(value, 1.0), m.unit))
+
+        return out
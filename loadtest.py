@@ -0,0 +1,168 @@
+"""
+Synthetic scale test for the storage and alert path.
+
+Drives engine cycles with fetchers/synthetic.py instead of the network
+fetchers, against a throwaway database, and reports per size:
+cycle time, DB growth, peak traced memory and alerts per second.
+
+DB growth is measured after the first cycle, so --cycles must be >= 2.
+Memory is the tracemalloc peak of Python allocations during that size
+only, reset between sizes (it slows cycles down slightly).
+
+    python loadtest.py --sizes 1000 10000 100000 --cycles 5
+    python loadtest.py --save-baseline loadtest_baseline.json
+    python loadtest.py --baseline loadtest_baseline.json --tolerance 0.25
+
+Exits 1 when a result regresses beyond the stored baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import engine
+from fetchers.synthetic import SyntheticFetcher
+from storage import sqlite as storage
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# lower is better for all of these
+CHECKED = ["cycle_avg_s", "db_growth_bytes", "peak_mem_kb"]
+
+
+def _db_size(path: str) -> int:
+    return sum(
+        os.path.getsize(p)
+        for p in (path, f"{path}-wal")
+        if os.path.exists(p)
+    )
+
+
+def run_size(size: int, cycles: int, seed: int) -> Dict:
+    """
+    Run `cycles` engine cycles with `size` synthetic metrics each.
+    """
+    db_file, history = storage.db_settings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "loadtest.db")
+        storage.use_db(db)
+
+        # fresh engine state for every size
+        engine.FETCHERS = {"synthetic": SyntheticFetcher(size, seed=seed)}
+        engine.reset_state()
+
+        times: List[float] = []
+        alerts = 0
+        first_size = None
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        try:
+            for _ in range(cycles):
+                started = time.perf_counter()
+                alerts += engine.run_cycle()
+                times.append(time.perf_counter() - started)
+
+                if first_size is None:
+                    first_size = _db_size(db)
+
+            db_growth = _db_size(db) - first_size
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            storage.use_db(db_file, history=history)
+
+    total = sum(times)
+
+    return {
+        "metrics": size,
+        "cycles": cycles,
+        "cycle_avg_s": total / cycles,
+        "cycle_max_s": max(times),
+        "db_growth_bytes": db_growth,
+        "peak_mem_kb": peak // 1024,
+        "alerts_per_s": alerts / total if total > 0 else 0.0,
+    }
+
+
+def compare(
+    results: List[Dict],
+    baseline: Dict[str, Dict],
+    tolerance: float,
+) -> List[str]:
+    """
+    Regressions of results against the baseline, keyed by size.
+    """
+    regressions: List[str] = []
+
+    for result in results:
+        base = baseline.get(str(result["metrics"]))
+        if not base:
+            continue
+
+        for field in CHECKED:
+            limit = base[field] * (1 + tolerance)
+            if result[field] > limit:
+                regressions.append(
+                    f"{result['metrics']} metrics: {field} "
+                    f"{result[field]:.4g} > {limit:.4g} "
+                    f"(baseline {base[field]:.4g})"
+                )
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", help="write results as a baseline file")
+    args = parser.parse_args(argv)
+
+    if args.cycles < 2:
+        parser.error("--cycles must be at least 2, growth is measured after the first cycle")
+
+    results: List[Dict] = []
+
+    for size in sorted(args.sizes):
+        result = run_size(size, args.cycles, args.seed)
+        results.append(result)
+
+        print(
+            f"{size:>7} metrics: "
+            f"cycle {result['cycle_avg_s']:.3f}s avg / {result['cycle_max_s']:.3f}s max, "
+            f"db +{result['db_growth_bytes'] / 1024:.0f} KiB, "
+            f"mem {result['peak_mem_kb']} KiB peak, "
+            f"{result['alerts_per_s']:.0f} alerts/s"
+        )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({str(r["metrics"]): r for r in results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
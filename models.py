@@ -0,0 +1,88 @@
+import sys
+from typing import Dict, Optional
+
+
+def _intern(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if s is not None else None
+
+
+class Metric:
+    """
+    One fetched sample.
+
+    Keys, names and units repeat every cycle, so they are interned.
+    """
+
+    __slots__ = ("key", "name", "value", "unit")
+
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        value: float,
+        unit: Optional[str] = None,
+    ):
+        self.key = sys.intern(key)
+        self.name = sys.intern(name)
+        self.value = float(value)
+        self.unit = _intern(unit)
+
+    def __repr__(self) -> str:
+        return f"Metric({self.key!r}, {self.value!r}, {self.unit!r})"
+
+
+class Alert:
+    """
+    Alert raised by the alert stage.
+
+    Holds the raw values only, the message is rendered on access
+    (i.e. when the alert is delivered).
+    """
+
+    __slots__ = (
+        "category",
+        "level",
+        "kind",
+        "metric_key",
+        "name",
+        "value",
+        "baseline",
+    )
+
+    def __init__(
+        self,
+        category: str,
+        level: str,
+        kind: str,
+        metric_key: str,
+        name: str,
+        value: float,
+        baseline: Optional[float] = None,
+    ):
+        self.category = sys.intern(category)
+        self.level = sys.intern(level)
+        self.kind = sys.intern(kind)
+        self.metric_key = sys.intern(metric_key)
+        self.name = sys.intern(name)
+        self.value = value
+        self.baseline = baseline
+
+    def __repr__(self) -> str:
+        return f"Alert({self.category!r}, {self.kind!r}, {self.metric_key!r})"
+
+    @property
+    def message(self) -> str:
+        # imported here, the alert modules import this one
+        if self.category == "caps":
+            from alerts.caps import render_caps_alert
+            return render_caps_alert(self)
+
+        from alerts.rates import render_rate_alert
+        return render_rate_alert(self)
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Alert":
+        return cls(**data)
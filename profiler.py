@@ -0,0 +1,123 @@
+"""
+On-demand profiling of engine cycles.
+
+Arm with STONKS_PROFILE_CYCLES=<n> or the $profile command. The next
+n cycles run under cProfile and tracemalloc and each writes a hotspot
+report to PROFILE_DIR.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_DIR = os.getenv("STONKS_PROFILE_DIR", "profiles")
+TOP_N = 20
+SUMMARY_TOP_N = 5
+
+_remaining = int(os.getenv("STONKS_PROFILE_CYCLES", "0") or 0)
+_summaries: List[str] = []
+
+
+def arm(cycles: int = 1):
+    global _remaining
+    _remaining = max(cycles, 0)
+
+
+def armed() -> bool:
+    return _remaining > 0
+
+
+def pop_summaries() -> List[str]:
+    """
+    Short reports of cycles profiled since the last call.
+    """
+    summaries = _summaries[:]
+    _summaries.clear()
+    return summaries
+
+
+def profile(fn: Callable[[], T]) -> T:
+    """
+    Run fn under the profilers and write a report, consuming one
+    armed cycle.
+    """
+    global _remaining
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+
+    # diffed against the end of the cycle, so only its own growth shows
+    before = tracemalloc.take_snapshot()
+
+    prof = cProfile.Profile()
+    started = time.perf_counter()
+
+    try:
+        return prof.runcall(fn)
+    finally:
+        elapsed = time.perf_counter() - started
+        growth = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        _, peak = tracemalloc.get_traced_memory()
+
+        if not tracing:
+            tracemalloc.stop()
+
+        _remaining = max(_remaining - 1, 0)
+        _summaries.append(_write_report(prof, growth, elapsed, peak))
+
+
+def _write_report(
+    prof: cProfile.Profile,
+    growth: List[tracemalloc.StatisticDiff],
+    elapsed: float,
+    peak: int,
+) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(
+        PROFILE_DIR,
+        time.strftime("cycle-%Y%m%d-%H%M%S.txt"),
+    )
+
+    out = io.StringIO()
+    stats = pstats.Stats(prof, stream=out)
+
+    out.write(f"Cycle time: {elapsed:.3f}s\n")
+    out.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n\n")
+
+    out.write("== Top functions (own time) ==\n")
+    stats.sort_stats("tottime").print_stats(TOP_N)
+
+    out.write("== Top functions (cumulative time) ==\n")
+    stats.sort_stats("cumulative").print_stats(TOP_N)
+
+    # peak above covers temporaries, this is what the cycle left behind
+    out.write("== Retained memory growth by line ==\n")
+    for stat in growth[:TOP_N]:
+        out.write(f"{stat}\n")
+
+    with open(path, "w") as f:
+        f.write(out.getvalue())
+
+    hotspots = sorted(
+        stats.stats.items(),
+        key=lambda item: item[1][2],
+        reverse=True,
+    )[:SUMMARY_TOP_N]
+
+    lines = [
+        f"**Cycle profile:** {elapsed:.2f}s, peak {peak / 1024:.0f} KiB",
+    ]
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in hotspots:
+        lines.append(
+            f"`{func}` ({os.path.basename(filename)}:{line}) "
+            f"{tottime:.3f}s own / {cumtime:.3f}s cum, {calls} calls"
+        )
+    lines.append(f"Report: `{path}`")
+
+    return "\n".join(lines)
@@ -0,0 +1,184 @@
+"""
+Replay historical samples through the alert stage.
+
+Runs offline against an isolated in-memory storage backend with a
+virtual clock, so thresholds can be tuned without touching state.db.
+
+    python replay.py --db state.db
+    python replay.py --file samples.jsonl --minor 0.02 --major 0.15
+
+Recorded files are JSON lines: {"ts", "key", "name", "value", "unit"}.
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import alerts.caps as caps
+import alerts.rates as rates
+from models import Alert, Metric
+from storage import sqlite as storage
+from engine import evaluate_metric
+
+
+FLAP_WINDOW_SECONDS = 60 * 60
+
+Sample = Tuple[int, str, str, float, Optional[str]]
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def read_file(path: str) -> Iterator[Sample]:
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            yield (
+                int(row["ts"]),
+                row["key"],
+                row.get("name", row["key"]),
+                float(row["value"]),
+                row.get("unit"),
+            )
+
+
+def replay(samples: Iterable[Sample]) -> Iterator[Tuple[Sample, List[Alert]]]:
+    """
+    Feed samples through the alert stage in order.
+
+    Storage is switched to a fresh in-memory database for the duration
+    and restored afterwards.
+    """
+    clock = VirtualClock()
+    db_file, history = storage.db_settings()
+
+    storage.use_db(":memory:", history=False)
+    storage.set_clock(clock)
+    storage.init_db()
+
+    try:
+        for sample in samples:
+            ts, key, name, value, unit = sample
+            clock.now = ts
+            yield sample, evaluate_metric(Metric(key, name, value, unit))
+    finally:
+        storage.set_clock(None)
+        storage.use_db(db_file, history=history)
+
+
+def summarize(
+    events: Iterable[Tuple[Sample, List[Alert]]],
+    flap_window: int = FLAP_WINDOW_SECONDS,
+) -> Dict:
+    """
+    Aggregate replay output.
+
+    - latency: time from the first value change after the previous
+      alert (or first observation) to the alert that reports it
+    - flaps: alerts on a key within flap_window of its previous alert
+    """
+    samples = 0
+    counts: Counter = Counter()
+    latencies: List[int] = []
+    flaps: Counter = Counter()
+
+    prev_value: Dict[str, float] = {}
+    onset: Dict[str, int] = {}
+    last_alert: Dict[str, int] = {}
+
+    for (ts, key, _, value, _), alerts in events:
+        samples += 1
+
+        seen = key in prev_value
+        if seen and value != prev_value[key] and key not in onset:
+            onset[key] = ts
+        prev_value[key] = value
+
+        for alert in alerts:
+            counts[(alert.category, alert.level)] += 1
+
+            # initial observations are not detections
+            if not seen or alert.kind == "initial":
+                continue
+
+            if key in onset:
+                latencies.append(ts - onset.pop(key))
+
+            if key in last_alert and ts - last_alert[key] <= flap_window:
+                flaps[key] += 1
+            last_alert[key] = ts
+
+    latencies.sort()
+
+    return {
+        "samples": samples,
+        "alerts": dict(counts),
+        "latency": {
+            "count": len(latencies),
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        },
+        "flaps": dict(flaps.most_common()),
+    }
+
+
+def _print_report(report: Dict, elapsed: float):
+    rate = report["samples"] / elapsed * 60 if elapsed > 0 else 0
+
+    print(f"Samples: {report['samples']} ({rate:,.0f}/min)")
+
+    print("Alerts:")
+    for (category, level), n in sorted(report["alerts"].items()):
+        print(f"  {category}/{level}: {n}")
+
+    latency = report["latency"]
+    print(
+        f"Latency to detection: n={latency['count']} "
+        f"p50={latency['p50']}s max={latency['max']}s"
+    )
+
+    print(f"Flapping keys: {len(report['flaps'])}")
+    for key, n in list(report["flaps"].items())[:10]:
+        print(f"  {key}: {n}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="replay samples from a state database")
+    source.add_argument("--file", help="replay samples from a JSON lines file")
+    parser.add_argument("--since", type=int, help="only samples at/after this unix ts")
+    parser.add_argument("--minor", type=float, default=rates.MINOR_CHANGE)
+    parser.add_argument("--major", type=float, default=rates.MAJOR_CHANGE)
+    parser.add_argument("--cap-threshold", type=float, default=caps.CAP_FULL_THRESHOLD)
+    parser.add_argument("--flap-window", type=int, default=FLAP_WINDOW_SECONDS)
+    args = parser.parse_args(argv)
+
+    rates.MINOR_CHANGE = args.minor
+    rates.MAJOR_CHANGE = args.major
+    caps.CAP_FULL_THRESHOLD = args.cap_threshold
+
+    if args.db:
+        samples = storage.iter_samples(args.db, since=args.since)
+    else:
+        samples = (
+            s for s in read_file(args.file)
+            if args.since is None or s[0] >= args.since
+        )
+
+    start = time.perf_counter()
+    report = summarize(replay(samples), flap_window=args.flap_window)
+    _print_report(report, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import re
+from fnmatch import translate
+from typing import Callable, Dict, List, Optional, Tuple
+
+_Matcher = Optional[Callable[[str], object]]
+
+
+class _Node:
+    __slots__ = ("children", "key", "_items")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.key: Optional[str] = None
+        self._items: Optional[List[Tuple[str, "_Node"]]] = None
+
+    def items(self) -> List[Tuple[str, "_Node"]]:
+        """
+        Children sorted by segment, cached until the next insert.
+        """
+        if self._items is None:
+            self._items = sorted(self.children.items())
+        return self._items
+
+
+class KeyTrie:
+    """
+    In-memory index over `<protocol>:<token>:<side>:<metric>` keys,
+    one trie level per segment.
+
+    - complete("euler:sen") -> keys starting with that text
+    - match("aave:*:borrow:*") -> glob per segment, a trailing `*`
+      also covers any remaining segments
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._names: Dict[str, str] = {}
+        self._sorted: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._names
+
+    def insert(self, key: str, name: str):
+        node = self._root
+        for segment in key.split(":"):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+                node._items = None
+            node = child
+
+        node.key = key
+        self._names[key] = name
+        self._sorted = None
+
+    def name(self, key: str) -> Optional[str]:
+        return self._names.get(key)
+
+    def keys(self) -> List[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self._names)
+        return self._sorted
+
+    def complete(self, prefix: str, limit: int = 25) -> List[str]:
+        *segments, partial = prefix.split(":")
+
+        node = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+
+        out: List[str] = []
+        for segment, child in node.items():
+            if segment.startswith(partial):
+                self._collect(child, out, limit)
+                if len(out) >= limit:
+                    break
+
+        return out[:limit]
+
+    def match(self, pattern: str, limit: Optional[int] = None) -> List[str]:
+        # (segment, glob matcher or None) built once, not per visited node
+        segments = [
+            (
+                segment,
+                re.compile(translate(segment)).match
+                if any(c in segment for c in "*?[") else None,
+            )
+            for segment in pattern.split(":")
+        ]
+
+        out: List[str] = []
+        self._match(self._root, segments, 0, out, limit)
+        return out[:limit]
+
+    def _collect(self, node: _Node, out: List[str], limit: Optional[int]):
+        if node.key is not None:
+            out.append(node.key)
+
+        for _, child in node.items():
+            if limit is not None and len(out) >= limit:
+                return
+            self._collect(child, out, limit)
+
+    def _match(
+        self,
+        node: _Node,
+        segments: List[Tuple[str, _Matcher]],
+        depth: int,
+        out: List[str],
+        limit: Optional[int],
+    ):
+        if limit is not None and len(out) >= limit:
+            return
+
+        if depth == len(segments):
+            if node.key is not None:
+                out.append(node.key)
+            return
+
+        head, glob = segments[depth]
+        depth += 1
+
+        if glob is None:
+            child = node.children.get(head)
+            if child is not None:
+                self._match(child, segments, depth, out, limit)
+            return
+
+        # a trailing `*` also covers any remaining segments
+        if head == "*" and depth == len(segments):
+            for _, child in node.items():
+                if limit is not None and len(out) >= limit:
+                    return
+                self._collect(child, out, limit)
+            return
+
+        for segment, child in node.items():
+            if head == "*" or glob(segment):
+                self._match(child, segments, depth, out, limit)
@@ -1,19 +1,112 @@
+import json
+import logging
 import sqlite3
 import time
-from threading import Lock
-from typing import Optional, List, Dict
+from contextlib import contextmanager
+from threading import RLock
+from typing import Callable, Iterator, Optional, List, Dict, Tuple
+
+from models import Alert
 
 
 _DB_FILE = "state.db"
-_LOCK = Lock()
+_LOCK = RLock()
+
+# bump when the outbox payload layout changes
+OUTBOX_VERSION = 2
+
+logger = logging.getLogger("stonks.storage")
+
+_CONN: Optional[sqlite3.Connection] = None
+_HISTORY = True
+_CLOCK: Callable[[], float] = time.time
+
+# > 0 while a transaction() is open, writes commit at its end
+_TX_DEPTH = 0
 
 
 def _connect():
-    return sqlite3.connect(_DB_FILE)
+    global _CONN
+    if _CONN is None:
+        _CONN = sqlite3.connect(_DB_FILE, check_same_thread=False)
+    return _CONN
+
+
+@contextmanager
+def _session() -> Iterator[sqlite3.Connection]:
+    # commit on success, roll back on error, unless a transaction() owns it
+    with _LOCK:
+        conn = _connect()
+        if _TX_DEPTH:
+            yield conn
+            return
+
+        with conn:
+            yield conn
+
+
+@contextmanager
+def transaction() -> Iterator[None]:
+    """
+    Group storage writes into one atomic commit.
+
+    Writes inside the block (record_sample, enqueue_alerts, ...) are
+    committed together when it exits, or rolled back if it raises.
+    Nested blocks join the outer one.
+    """
+    global _TX_DEPTH
+
+    with _session():
+        _TX_DEPTH += 1
+        try:
+            yield
+        finally:
+            _TX_DEPTH -= 1
+
+
+def use_db(db_file: str, *, history: bool = True):
+    """
+    Point storage at another database file.
+
+    ":memory:" gives an isolated, throwaway backend (used by replay).
+    With history=False samples only update the latest value.
+    """
+    global _DB_FILE, _CONN, _HISTORY
+
+    with _LOCK:
+        if _CONN is not None:
+            _CONN.close()
+        _DB_FILE = db_file
+        _CONN = None
+        _HISTORY = history
+
+
+def db_settings() -> Tuple[str, bool]:
+    """
+    Current (db_file, history), to restore after a temporary use_db.
+    """
+    return _DB_FILE, _HISTORY
+
+
+def set_clock(clock: Optional[Callable[[], float]] = None):
+    """
+    Override the time source used for sample timestamps.
+    Passing None restores wall-clock time.
+    """
+    global _CLOCK
+    _CLOCK = clock or time.time
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str):
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
 
 
 def init_db():
-    with _LOCK, _connect() as conn:
+    with _session() as conn:
+        # engine daemon and bot may share the file
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS metrics (
@@ -25,7 +118,43 @@ def init_db():
             )
             """
         )
-        conn.commit()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS samples (
+                key TEXT,
+                name TEXT,
+                value REAL,
+                unit TEXT,
+                ts INTEGER
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runtime (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT,
+                created_at INTEGER,
+                sent_at INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                failed_at INTEGER
+            )
+            """
+        )
+        # outbox tables created before delivery retries
+        _add_column(conn, "outbox", "attempts", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "outbox", "failed_at", "INTEGER")
 
 
 def record_sample(
@@ -34,9 +163,9 @@ def record_sample(
     value: float,
     unit: Optional[str] = None,
 ):
-    now = int(time.time())
+    now = int(_CLOCK())
 
-    with _LOCK, _connect() as conn:
+    with _session() as conn:
         conn.execute(
             """
             INSERT INTO metrics (key, name, value, unit, updated_at)
@@ -49,11 +178,19 @@ def record_sample(
             """,
             (metric_key, name, value, unit, now),
         )
-        conn.commit()
+        # baselines are derived by the alert stage, not history
+        if _HISTORY and not metric_key.endswith(":baseline"):
+            conn.execute(
+                """
+                INSERT INTO samples (key, name, value, unit, ts)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (metric_key, name, value, unit, now),
+            )
 
 
 def get_last(metric_key: str) -> Optional[float]:
-    with _LOCK, _connect() as conn:
+    with _session() as conn:
         cur = conn.execute(
             "SELECT value FROM metrics WHERE key = ?",
             (metric_key,),
@@ -63,7 +200,7 @@ def get_last(metric_key: str) -> Optional[float]:
 
 
 def list_metrics() -> List[Dict]:
-    with _LOCK, _connect() as conn:
+    with _session() as conn:
         cur = conn.execute(
             """
             SELECT key, name, unit
@@ -80,4 +217,172 @@ def list_metrics() -> List[Dict]:
             "unit": unit,
         }
         for key, name, unit in rows
-    ]
\ No newline at end of file
+    ]
+
+
+def iter_samples(
+    db_file: Optional[str] = None,
+    since: Optional[int] = None,
+) -> Iterator[Tuple[int, str, str, float, Optional[str]]]:
+    """
+    Stream recorded samples in time order as (ts, key, name, value, unit).
+
+    Baseline keys are skipped (older databases recorded them).
+    Uses its own connection so it can read one database while
+    storage points at another.
+    """
+    conn = sqlite3.connect(db_file or _DB_FILE)
+
+    try:
+        cur = conn.execute(
+            """
+            SELECT ts, key, name, value, unit
+            FROM samples
+            WHERE ts >= ? AND key NOT LIKE '%:baseline'
+            ORDER BY ts, rowid
+            """,
+            (since or 0,),
+        )
+        for row in cur:
+            yield row
+    finally:
+        conn.close()
+
+
+def save_snapshot(snapshot: Dict):
+    """
+    Persist the engine runtime snapshot (replaces the previous one).
+    """
+    with _session() as conn:
+        conn.execute(
+            """
+            INSERT INTO runtime (key, value) VALUES ('snapshot', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """,
+            (json.dumps(snapshot, separators=(",", ":")),),
+        )
+
+
+def load_snapshot() -> Optional[Dict]:
+    with _session() as conn:
+        cur = conn.execute(
+            "SELECT value FROM runtime WHERE key = 'snapshot'"
+        )
+        row = cur.fetchone()
+
+    return json.loads(row[0]) if row else None
+
+
+def enqueue_alerts(alerts: List[Alert]):
+    """
+    Append alerts to the durable outbox for later delivery.
+    """
+    if not alerts:
+        return
+
+    now = int(_CLOCK())
+
+    with _session() as conn:
+        conn.executemany(
+            "INSERT INTO outbox (payload, created_at) VALUES (?, ?)",
+            [
+                (json.dumps({"v": OUTBOX_VERSION, "alert": alert.to_dict()}), now)
+                for alert in alerts
+            ],
+        )
+
+
+def pending_alerts(limit: int = 50) -> List[Tuple[int, int, Alert]]:
+    """
+    Oldest undelivered alerts as (id, created_at, alert).
+
+    Rows that can't be decoded (older payload versions, corrupt JSON)
+    are logged and dead-lettered so they never block delivery.
+    """
+    with _session() as conn:
+        cur = conn.execute(
+            """
+            SELECT id, created_at, payload
+            FROM outbox
+            WHERE sent_at IS NULL AND failed_at IS NULL
+            ORDER BY id
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        rows = cur.fetchall()
+
+    alerts: List[Tuple[int, int, Alert]] = []
+
+    for alert_id, created_at, payload in rows:
+        try:
+            data = json.loads(payload)
+            if data.get("v") != OUTBOX_VERSION:
+                raise ValueError(f"unsupported payload version {data.get('v')}")
+            alert = Alert.from_dict(data["alert"])
+        except Exception as e:
+            logger.warning(f"Dropping undecodable outbox alert {alert_id}: {e}")
+            mark_failed(alert_id, permanent=True)
+            continue
+
+        alerts.append((alert_id, created_at, alert))
+
+    return alerts
+
+
+def mark_sent(alert_id: int):
+    """
+    Mark an outbox alert as delivered. Safe to call more than once.
+    """
+    with _session() as conn:
+        conn.execute(
+            "UPDATE outbox SET sent_at = ? WHERE id = ? AND sent_at IS NULL",
+            (int(_CLOCK()), alert_id),
+        )
+
+
+def mark_failed(alert_id: int, *, permanent: bool = False, max_attempts: int = 1) -> bool:
+    """
+    Count a failed delivery attempt.
+
+    The alert is dead-lettered (kept, never retried) when the failure is
+    permanent or after max_attempts. Returns True if it was.
+    """
+    with _session() as conn:
+        conn.execute(
+            """
+            UPDATE outbox SET
+                attempts = attempts + 1,
+                failed_at = CASE WHEN ? OR attempts + 1 >= ? THEN ? END
+            WHERE id = ? AND sent_at IS NULL AND failed_at IS NULL
+            """,
+            (permanent, max_attempts, int(_CLOCK()), alert_id),
+        )
+        row = conn.execute(
+            "SELECT failed_at FROM outbox WHERE id = ?",
+            (alert_id,),
+        ).fetchone()
+
+    return bool(row and row[0] is not None)
+
+
+def prune_outbox(max_age: int):
+    """
+    Drop delivered and dead-lettered alerts older than max_age seconds.
+    """
+    with _session() as conn:
+        conn.execute(
+            "DELETE FROM outbox WHERE COALESCE(sent_at, failed_at) < ?",
+            (int(_CLOCK()) - max_age,),
+        )
+
+
+def prune_samples(max_age: int):
+    """
+    Drop history samples older than max_age seconds.
+    """
+    with _session() as conn:
+        conn.execute(
+            "DELETE FROM samples WHERE ts < ?",
+            (int(_CLOCK()) - max_age,),
+        )
@@ -0,0 +1,169 @@
+import json
+
+import pytest
+import requests
+
+from fetchers import client
+
+
+URL = "https://example.test/markets"
+
+
+def _response(status: int, payload=None, headers=None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r.url = URL
+    r.headers.update(headers or {})
+    r._content = json.dumps(payload).encode() if payload is not None else b""
+    r._content_consumed = True
+    return r
+
+
+class StubSession:
+    """
+    Stands in for client._SESSION, replays queued responses in order.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.calls = []
+
+    def get(self, url, headers, timeout, stream=False):
+        self.calls.append(("GET", url, dict(headers), None))
+        return self.responses.pop(0)
+
+    def post(self, url, json, headers, timeout):
+        self.calls.append(("POST", url, dict(headers), json))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    stub = StubSession()
+    monkeypatch.setattr(client, "_SESSION", stub)
+    monkeypatch.setattr(client, "_CACHE", {})
+    return stub
+
+
+EXTRACTED = []
+
+
+def _extract_rate(payload):
+    EXTRACTED.append(payload)
+    return payload["rate"]
+
+
+def _extract_double(payload):
+    return payload["rate"] * 2
+
+
+@pytest.fixture(autouse=True)
+def _clear_extracted():
+    EXTRACTED.clear()
+
+
+def test_not_modified_returns_cached_result(session):
+    session.responses = [
+        _response(200, {"rate": 1}, {"ETag": '"v1"', "Last-Modified": "Mon"}),
+        _response(304),
+    ]
+
+    assert client.fetch_json(URL, _extract_rate) == 1
+    assert client.fetch_json(URL, _extract_rate) == 1
+
+    assert session.calls[0][2] == {}
+    assert session.calls[1][2] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon"}
+    assert len(EXTRACTED) == 1
+
+
+def test_identical_body_skips_extract(session):
+    session.responses = [
+        _response(200, {"rate": 1}),
+        _response(200, {"rate": 1}),
+        _response(200, {"rate": 2}),
+    ]
+
+    assert client.fetch_json(URL, _extract_rate) == 1
+    assert client.fetch_json(URL, _extract_rate) == 1
+    assert len(EXTRACTED) == 1
+
+    assert client.fetch_json(URL, _extract_rate) == 2
+    assert len(EXTRACTED) == 2
+
+
+def test_post_sends_no_validators(session):
+    body = {"query": "{ rate }"}
+    session.responses = [
+        _response(200, {"rate": 1}, {"ETag": '"v1"', "Last-Modified": "Mon"}),
+        _response(200, {"rate": 1}, {"ETag": '"v1"'}),
+    ]
+
+    assert client.fetch_json(URL, _extract_rate, body=body) == 1
+    assert client.fetch_json(URL, _extract_rate, body=body) == 1
+
+    method, _, headers, sent = session.calls[1]
+    assert method == "POST"
+    assert headers == {}
+    assert sent == body
+    # unchanged bytes still hit the fingerprint
+    assert len(EXTRACTED) == 1
+
+
+def test_post_bodies_are_cached_separately(session):
+    session.responses = [
+        _response(200, {"rate": 1}, {"ETag": '"v1"'}),
+        _response(200, {"rate": 1}),
+    ]
+
+    client.fetch_json(URL, _extract_rate, body={"query": "a"})
+    client.fetch_json(URL, _extract_rate, body={"query": "b"})
+
+    assert len(EXTRACTED) == 2
+
+
+def test_cache_key_includes_extract(session):
+    session.responses = [
+        _response(200, {"rate": 1}, {"ETag": '"v1"'}),
+        _response(200, {"rate": 1}, {"ETag": '"v1"'}),
+    ]
+
+    assert client.fetch_json(URL, _extract_rate) == 1
+    assert client.fetch_json(URL, _extract_double) == 2
+
+    # a different extract has no cache entry, so no validators either
+    assert session.calls[1][2] == {}
+
+
+def test_error_status_raises_and_keeps_cache(session):
+    session.responses = [
+        _response(200, {"rate": 1}, {"ETag": '"v1"'}),
+        _response(500),
+        _response(304),
+    ]
+
+    client.fetch_json(URL, _extract_rate)
+    with pytest.raises(requests.HTTPError):
+        client.fetch_json(URL, _extract_rate)
+
+    assert client.fetch_json(URL, _extract_rate) == 1
+    assert session.calls[2][2] == {"If-None-Match": '"v1"'}
+
+
+def _first_value(values):
+    for _, value in values:
+        return value
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_fetch_fields(session, monkeypatch, stream):
+    monkeypatch.setattr(client, "STREAM_JSON", stream)
+    payload = {"a": {"rate": 1}, "b": {"rate": 2}}
+    session.responses = [_response(200, payload), _response(200, payload)]
+
+    paths = [("*", "rate")]
+    assert client.fetch_fields(URL, paths, _first_value) == 1
+    assert client.fetch_fields(URL, paths, _first_value) == 1
+
+    # only the fully decoded body is fingerprinted
+    entry = client._CACHE[(URL, tuple(paths), _first_value)]
+    assert (entry["fingerprint"] is None) == stream
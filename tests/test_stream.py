@@ -0,0 +1,121 @@
+import json
+import random
+
+import pytest
+
+from fetchers.stream import iter_values, walk
+
+
+PATTERNS = [
+    ("*", "vaultSymbol"),
+    ("*", "irmInfo", "interestRateInfo", 0, "borrowAPY"),
+    ("*", "supplyCap"),
+    ("meta", "*"),
+    ("list", "*"),
+]
+
+
+def _value(rng: random.Random, depth: int):
+    kind = rng.randrange(8 if depth < 3 else 5)
+
+    if kind == 0:
+        return rng.choice([True, False, None])
+    if kind == 1:
+        return rng.randint(-10**20, 10**20)
+    if kind == 2:
+        return rng.choice([0.0, -0.0025, 1e-7, 12.5e30, rng.uniform(-1e6, 1e6)])
+    if kind == 3:
+        return rng.choice(["", "USDC", 'q"uo\\te', "é€\U0001f4b0", "a\nb\tc"])
+    if kind == 4:
+        return str(rng.randint(0, 10**30))
+    if kind == 5:
+        return [_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {
+        key: _value(rng, depth + 1)
+        for key in rng.sample(
+            ["vaultSymbol", "irmInfo", "interestRateInfo", "borrowAPY", "supplyCap", "x", "ü"],
+            rng.randrange(5),
+        )
+    }
+
+
+def _document(rng: random.Random):
+    vaults = {}
+    for i in range(rng.randrange(1, 6)):
+        vault = _value(rng, 1)
+        if isinstance(vault, dict) and rng.random() < 0.7:
+            vault["vaultSymbol"] = f"e{i}"
+            vault["irmInfo"] = {"interestRateInfo": [{"borrowAPY": str(rng.randint(0, 10**27))}]}
+        vaults[f"0x{i:040x}"] = vault
+
+    vaults["meta"] = _value(rng, 1)
+    vaults["list"] = [_value(rng, 2) for _ in range(rng.randrange(4))]
+    return vaults
+
+
+def _chunks(raw: bytes, rng: random.Random, max_size: int):
+    pos = 0
+    while pos < len(raw):
+        size = rng.randint(0, max_size)  # empty chunks happen too
+        yield raw[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_json_loads_across_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    doc = _document(rng)
+    raw = json.dumps(doc, indent=rng.choice([None, 1]), ensure_ascii=rng.random() < 0.5).encode()
+
+    expected = list(walk(json.loads(raw), PATTERNS))
+
+    for max_size in (1, 2, 3, 7, 64, len(raw)):
+        got = list(iter_values(_chunks(raw, rng, max_size), PATTERNS))
+        assert got == expected
+
+
+def test_stops_reading_when_consumer_stops():
+    read = []
+
+    def chunks():
+        for chunk in (b'{"a": {"b": 1}, ', b'"c": 2}'):
+            read.append(chunk)
+            yield chunk
+
+    values = iter_values(chunks(), [("a", "b")])
+    assert next(values) == (("a", "b"), 1)
+    assert len(read) == 1
+
+
+@pytest.mark.parametrize("raw", [
+    b'{"a": 1',
+    b'{"a": {"b": [1, 2',
+    b'{"a": "abc',
+    b'{"skipped": {"b": "x',
+    b'"abc',
+    b'',
+])
+def test_truncated_input(raw):
+    for size in (1, len(raw) or 1):
+        chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+        with pytest.raises(ValueError):
+            list(iter_values(chunks, [("a",), ("a", "*"), ("a", "b", "*"), ()]))
+
+
+@pytest.mark.parametrize("raw", [
+    b'{"a": tru}',
+    b'{"a": nul}',
+    b'[1,]',
+    b'{"a" 1}',
+    b'{"a": 1 "b": 2}',
+    b'{a: 1}',
+    b'{"a": 01}',
+    b'{"a": 1.}',
+    b'{"a": -}',
+    b'{"a": +1}',
+])
+def test_invalid_input(raw):
+    for size in (1, len(raw)):
+        chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+        with pytest.raises(ValueError):
+            list(iter_values(chunks, [("a",), ("*",)]))